@@ -1,31 +1,109 @@
 import streamlit as st
 import json
 import fitz  # PyMuPDF
-import time
+import numpy as np
+import xxhash
 import re
+import functools
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from io import BytesIO
 
 
 # Set up the page layout and title
 st.set_page_config(page_title="Document Analysis Tool", layout="wide")
 st.title("PDF Document Analyzer")
 
+# ----------------- Precompiled Text Patterns ----------------- #
+
+# Compiled once at import so the per-span loops never hit the regex compiler
+_PURE_NUM_RE = re.compile(r'^\d+$')
+_TITLE_NUM_PREFIX_RE = re.compile(r'^\d+\.?\s')
+
+# Patterns that indicate non-headings (matched against lowercased text)
+NON_HEADING_PATTERNS = [
+    r'^\d+$', r'^page\s+\d+', r'^figure\s+\d+',
+    r'^table\s+\d+', r'^\w{1,2}$', r'^[^\w\s]+$',
+    r'^\d{4}$', r'^www\.', r'@'
+]
+
+# Common heading patterns, each with the heading level its match implies.
+# Alternatives are tried in this order, so a numbered pattern only wins when
+# the shallower ones failed; None means the level needs the full check.
+HEADING_PATTERNS = [
+    (r'^\d+\.?\s+[A-Z]', "H1"), (r'^\d+\.\d+\.?\s+[A-Z]', "H2"),
+    (r'^\d+\.\d+\.\d+\.?\s+[A-Z]', "H3"), (r'^\d+\.\d+\.\d+\.\d+\.?\s+[A-Z]', "H4"),
+    (r'^[A-Z][a-z]+(\s+[A-Z&][a-z]*)*:?\s*$', None), (r'^[A-Z][A-Z\s&]+:?\s*$', None),
+    (r'^Appendix\s+[A-Z]', None), (r'^Phase\s+[IVX]', None),
+    (r'^For\s+(each|the)\s+[A-Z]', None), (r'^\d+\.\s+[A-Z]', None)
+]
+
+# Keywords often found in headings
+HEADING_KEYWORDS = [
+    'summary', 'background', 'introduction', 'conclusion',
+    'abstract', 'references', 'methodology', 'approach',
+    'requirements', 'evaluation', 'timeline', 'milestones',
+    'appendix', 'phase', 'business', 'plan'
+]
+
+# Alternatives combined into one pattern each, so a span costs a single match call.
+# Plain re is kept over RE2/Hyperscan: spans are at most 150 characters, where
+# the per-call overhead of those bindings outweighs their linear-time matching.
+_NON_HEADING_RE = re.compile('|'.join(f'(?:{p})' for p in NON_HEADING_PATTERNS))
+# Each heading alternative is a named group, so the match reports which one hit
+_HEADING_RE = re.compile('|'.join(f'(?P<p{i}>{p})' for i, (p, _) in enumerate(HEADING_PATTERNS)))
+_HEADING_RE_LEVELS = {f'p{i}': level for i, (_, level) in enumerate(HEADING_PATTERNS)}
+# One search finds any keyword instead of one substring scan per keyword
+_KEYWORD_RE = re.compile('|'.join(re.escape(w) for w in HEADING_KEYWORDS))
+
+# Heading level patterns, checked in order
+_NUM_H1_RE = re.compile(r'^\d+\.?\s+[A-Z]')
+_NUM_H2_RE = re.compile(r'^\d+\.\d+\.?\s+')
+_NUM_H3_RE = re.compile(r'^\d+\.\d+\.\d+\.?\s+')
+_NUM_H4_RE = re.compile(r'^\d+\.\d+\.\d+\.\d+\.?\s+')
+_APPENDIX_RE = re.compile(r'^Appendix\s+[A-Z]:')
+_PHASE_RE = re.compile(r'^Phase\s+[IVX]+:')
+_FOR_EACH_RE = re.compile(r'^For\s+(each|the)\s+[A-Z]')
+_NUM_ITEM_RE = re.compile(r'^\d+\.\s+[A-Z]')
+
+# Word tokens for persona matching, so punctuation spacing in the page text
+# cannot split a term off ("flags :" and "flags:" both yield "flags")
+_WORD_RE = re.compile(r'\w+')
+
+# Heading levels indexed by the size-based fallback rank
+_HEADING_LEVELS = ("H1", "H2", "H3", "H4")
+
+# Default page budget per document, shared by extraction and section splitting
+MAX_PAGES = 50
+
+# Below this many pages in total, splitting serially beats handing files to workers
+PARALLEL_MIN_PAGES = 300
+
+# Uploads are cached under an xxHash digest passed alongside the bytes; the
+# bytes argument itself is underscore-prefixed so st.cache_data skips it
+def _pdf_cache_key(pdf_bytes):
+    return xxhash.xxh64_intdigest(pdf_bytes)
+
 # ----------------- PDF Text Extraction Functions ----------------- #
 
-def extract_text_from_pdf(pdf_file):
-    """Reads text content from PDF along with formatting details"""
-    pdf_doc = fitz.open(stream=pdf_file, filetype="pdf")
-    extracted_content = []
+def _extract_spans(pdf_doc, max_pages=MAX_PAGES):
+    """Reads text spans from an open PDF as parallel columns"""
+    texts, lower_texts, word_counts = [], [], []
+    sizes, flags, pages = [], [], []
     
-    # Limit to first 50 pages to avoid very long processing
-    max_pages = min(len(pdf_doc), 50)
+    # Limit to the first pages to avoid very long processing
+    max_pages = min(len(pdf_doc), max_pages)
+    
+    # Image blocks are never used, so keep MuPDF from emitting them at all
+    text_flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
     
     for current_page in range(max_pages):
-        page_blocks = pdf_doc[current_page].get_text("dict")["blocks"]
+        page_blocks = pdf_doc[current_page].get_text("dict", flags=text_flags)["blocks"]
         
         for block in page_blocks:
-            if "lines" not in block:
+            if block.get("type") != 0 or "lines" not in block:
                 continue
                 
             for line in block["lines"]:
@@ -36,174 +114,186 @@ def extract_text_from_pdf(pdf_file):
                     if not clean_text or len(clean_text) <= 1:
                         continue
                         
-                    extracted_content.append({
-                        "text": clean_text,
-                        "size": text_span["size"],
-                        "font": text_span["font"],
-                        "flags": text_span.get("flags", 0),
-                        "page": current_page + 1,
-                        "bbox": text_span["bbox"]
-                    })
+                    # Tokenize once here instead of in every predicate
+                    words = clean_text.split()
+                    texts.append(clean_text)
+                    lower_texts.append(" ".join(words).lower())
+                    word_counts.append(len(words))
+                    sizes.append(text_span["size"])
+                    flags.append(text_span.get("flags", 0))
+                    pages.append(current_page + 1)
     
-    pdf_doc.close()
-    return extracted_content
+    return {
+        "text": texts,
+        "lower": lower_texts,
+        "word_count": np.asarray(word_counts, dtype=np.int16),
+        "size": np.asarray(sizes, dtype=np.float32),
+        "flags": np.asarray(flags, dtype=np.int32),
+        "page": np.asarray(pages, dtype=np.int32)
+    }
 
 
 # ----------------- Document Structure Analysis ----------------- #
 
+@functools.lru_cache(maxsize=4096)
+def _clean_text(text_string):
+    """Normalizes text by removing extra spaces
+
+    str.split() collapses the same Unicode whitespace as a regex would,
+    without going through the regex engine. Running headers and footers
+    repeat on every page, so results are memoized; the cache lasts one
+    script run, since Streamlit re-executes this module on each rerun.
+    """
+    return ' '.join(text_string.split())
+
+
+def _is_quality_heading(text_content, word_count):
+    """Additional quality checks that drop generic or numeric headings"""
+    return (word_count >= 2 and
+            not _PURE_NUM_RE.match(text_content) and
+            not text_content.lower() in ['page', 'figure', 'table'] and
+            len(text_content.strip()) >= 3)
+
+
+def _could_be_title(text_item, text_lower):
+    """Determines if text is likely the document title
+
+    Page, size and word count requirements are applied beforehand as a
+    vectorized mask, so only the text-based checks remain here.
+    """
+
+    # Filter out common false positives
+    if _TITLE_NUM_PREFIX_RE.match(text_item):
+        return False
+    if text_lower.startswith(('page', 'chapter')):
+        return False
+
+    return True
+
+
+def _looks_like_heading(text_item, text_lower, word_count, format_score):
+    """Checks if text matches heading characteristics
+
+    format_score is the precomputed bold/size part of the heading score.
+    Returns (is_heading, level), where level is the heading level implied
+    by a matched numbering pattern, or None when it is still undecided.
+    """
+    normalized_text = _clean_text(text_item)
+
+    # Length filters for headings
+    if len(normalized_text) < 2 or len(normalized_text) > 150:
+        return False, None
+
+    if word_count > 20:  # Too long for a heading
+        return False, None
+
+    contains_keyword = _KEYWORD_RE.search(text_lower) is not None
+    ends_with_colon = normalized_text.endswith(':')
+
+    # Score the heading likelihood from the cheap clues first
+    heading_score = format_score
+    if contains_keyword: heading_score += 2
+    if ends_with_colon: heading_score += 1
+
+    # Even a pattern match (+3) cannot reach the threshold, skip the regexes
+    if heading_score + 3 < 4:
+        return False, None
+
+    # Patterns that indicate non-headings
+    if _NON_HEADING_RE.match(text_lower):
+        return False, None
+
+    if heading_score >= 4:
+        return True, None
+
+    # Common heading patterns decide the remaining cases
+    pattern_match = _HEADING_RE.match(normalized_text)
+    if pattern_match is None:
+        return False, None
+    return True, _HEADING_RE_LEVELS[pattern_match.lastgroup]
+
+
+@functools.lru_cache(maxsize=4096)
+def _determine_heading_level(text_item, fallback_level):
+    """Classifies heading hierarchy level"""
+    clean_text = _clean_text(text_item)
+
+    # First check numbering patterns
+    if _NUM_H1_RE.match(clean_text):
+        return "H1"
+    elif _NUM_H2_RE.match(clean_text):
+        return "H2"
+    elif _NUM_H3_RE.match(clean_text):
+        return "H3"
+    elif _NUM_H4_RE.match(clean_text):
+        return "H4"
+
+    # Special cases
+    if _APPENDIX_RE.match(clean_text):
+        return "H2"
+    elif _PHASE_RE.match(clean_text):
+        return "H3"
+    elif _FOR_EACH_RE.match(clean_text):
+        return "H4"
+    elif _NUM_ITEM_RE.match(clean_text):
+        return "H3"
+
+    # Fallback to the precomputed size-based classification
+    return _HEADING_LEVELS[fallback_level]
+
+
 def analyze_document_structure(text_elements):
     """Identifies titles and headings in the document"""
-    if not text_elements:
+    if not text_elements or not text_elements["text"]:
         return [], "No Title Found"
     
-    # Calculate average font size for reference
-    all_sizes = [item["size"] for item in text_elements]
-    average_size = sum(all_sizes) / len(all_sizes)
+    texts = text_elements["text"]
+    lower_texts = text_elements["lower"]
+    word_counts = text_elements["word_count"]
+    # Compare in float64 so thresholds match the scalar checks exactly
+    sizes = text_elements["size"].astype(np.float64)
+    flags = text_elements["flags"]
+    pages = text_elements["page"]
     
-    # Get sorted list of unique font sizes
-    unique_font_sizes = sorted(set(all_sizes), reverse=True)
+    # Calculate average and largest font size for reference
+    average_size = float(sizes.mean())
+    max_size = float(sizes.max())
     
-    def clean_text(text_string):
-        """Normalizes text by removing extra spaces"""
-        return re.sub(r'\s+', ' ', text_string.strip())
+    # Get sorted (ascending) array of unique font sizes
+    unique_font_sizes = np.unique(sizes)
     
-    def could_be_title(text_item, size, page_num, flags_value):
-        """Determines if text is likely the document title"""
-        # Titles usually appear early in the document
-        if page_num > 2:
-            return False
-        
-        # Should be among the largest text in document
-        if size < max(all_sizes) * 0.9:
-            return False
-            
-        word_count = len(text_item.split())
-        # Titles are typically between 3-25 words
-        if word_count < 3 or word_count > 25:
-            return False
-            
-        # Filter out common false positives
-        if re.match(r'^\d+\.?\s', text_item):
-            return False
-        if text_item.lower().startswith(('page', 'chapter')):
-            return False
-            
-        return True
+    # Formatting predicates evaluated over all spans at once
+    # Titles appear early, are among the largest text and span 3-25 words
+    title_mask = ((pages <= 2) & (sizes >= max_size * 0.9) &
+                  (word_counts >= 3) & (word_counts <= 25))
+    bold_mask = (flags & 16).astype(bool)
+    larger_mask = sizes > average_size * 1.15
+    very_large_mask = sizes >= average_size * 1.3
     
-    def looks_like_heading(text_item, size, page_num, flags_value):
-        """Checks if text matches heading characteristics"""
-        normalized_text = clean_text(text_item)
-        
-        # Length filters for headings
-        if len(normalized_text) < 2 or len(normalized_text) > 150:
-            return False
-            
-        word_count = len(normalized_text.split())
-        if word_count > 20:  # Too long for a heading
-            return False
-            
-        # Patterns that indicate non-headings
-        non_heading_patterns = [
-            r'^\d+$', r'^page\s+\d+', r'^figure\s+\d+', 
-            r'^table\s+\d+', r'^\w{1,2}$', r'^[^\w\s]+$',
-            r'^\d{4}$', r'^www\.', r'@'
-        ]
-        
-        if any(re.match(p, normalized_text.lower()) for p in non_heading_patterns):
-            return False
-            
-        # Formatting clues
-        is_bold = bool(flags_value & 16)
-        larger_than_normal = size > average_size * 1.15
-        
-        # Common heading patterns
-        heading_patterns = [
-            r'^\d+\.?\s+[A-Z]', r'^\d+\.\d+\.?\s+[A-Z]',
-            r'^\d+\.\d+\.\d+\.?\s+[A-Z]', r'^\d+\.\d+\.\d+\.\d+\.?\s+[A-Z]',
-            r'^[A-Z][a-z]+(\s+[A-Z&][a-z]*)*:?\s*$', r'^[A-Z][A-Z\s&]+:?\s*$',
-            r'^Appendix\s+[A-Z]', r'^Phase\s+[IVX]',
-            r'^For\s+(each|the)\s+[A-Z]', r'^\d+\.\s+[A-Z]'
-        ]
-        
-        matches_pattern = any(re.match(p, normalized_text) for p in heading_patterns)
-        
-        # Keywords often found in headings
-        common_heading_words = [
-            'summary', 'background', 'introduction', 'conclusion',
-            'abstract', 'references', 'methodology', 'approach',
-            'requirements', 'evaluation', 'timeline', 'milestones',
-            'appendix', 'phase', 'business', 'plan'
-        ]
-        
-        contains_keyword = any(w in normalized_text.lower() for w in common_heading_words)
-        ends_with_colon = normalized_text.endswith(':')
-        
-        # Score the heading likelihood
-        heading_score = 0
-        if is_bold: heading_score += 2
-        if matches_pattern: heading_score += 3
-        if larger_than_normal: heading_score += 1
-        if contains_keyword: heading_score += 2
-        if ends_with_colon: heading_score += 1
-        if size >= average_size * 1.3: heading_score += 1
-        
-        return heading_score >= 4
+    # Formatting part of the heading score: bold +2, larger +1, very large +1
+    format_scores = (2 * bold_mask + larger_mask + very_large_mask).astype(np.int8)
     
-    def determine_heading_level(text_item, size, page_num):
-        """Classifies heading hierarchy level"""
-        clean_text = re.sub(r'\s+', ' ', text_item.strip())
-        
-        # First check numbering patterns
-        if re.match(r'^\d+\.?\s+[A-Z]', clean_text):
-            return "H1"
-        elif re.match(r'^\d+\.\d+\.?\s+', clean_text):
-            return "H2"
-        elif re.match(r'^\d+\.\d+\.\d+\.?\s+', clean_text):
-            return "H3"
-        elif re.match(r'^\d+\.\d+\.\d+\.\d+\.?\s+', clean_text):
-            return "H4"
-        
-        # Special cases
-        if re.match(r'^Appendix\s+[A-Z]:', clean_text):
-            return "H2"
-        elif re.match(r'^Phase\s+[IVX]+:', clean_text):
-            return "H3"
-        elif re.match(r'^For\s+(each|the)\s+[A-Z]', clean_text):
-            return "H4"
-        elif re.match(r'^\d+\.\s+[A-Z]', clean_text):
-            return "H3"
-        
-        # Fallback to size-based classification
-        if len(unique_font_sizes) >= 4:
-            size_rank = unique_font_sizes.index(size) if size in unique_font_sizes else len(unique_font_sizes) - 1
-            
-            if size_rank == 0:
-                return "H1"
-            elif size_rank == 1:
-                return "H2"
-            elif size_rank == 2:
-                return "H3"
-            else:
-                return "H4"
-        else:
-            # Simple size thresholds
-            if size >= average_size * 1.4:
-                return "H1"
-            elif size >= average_size * 1.25:
-                return "H2"
-            elif size >= average_size * 1.1:
-                return "H3"
-            else:
-                return "H4"
+    # Size-based fallback level for every span (index into _HEADING_LEVELS)
+    if len(unique_font_sizes) >= 4:
+        # Rank 0 is the largest size; everything from rank 3 down is H4
+        size_ranks = len(unique_font_sizes) - 1 - np.searchsorted(unique_font_sizes, sizes)
+        fallback_levels = np.minimum(size_ranks, 3)
+    else:
+        # Simple size thresholds
+        fallback_levels = np.select(
+            [sizes >= average_size * 1.4, sizes >= average_size * 1.25, sizes >= average_size * 1.1],
+            [0, 1, 2],
+            default=3
+        )
     
     # Find potential title candidates
     possible_titles = []
-    for element in text_elements:
-        if could_be_title(element["text"], element["size"], element["page"], element["flags"]):
+    for idx in np.flatnonzero(title_mask):
+        if _could_be_title(texts[idx], lower_texts[idx]):
             possible_titles.append({
-                "text": clean_text(element["text"]),
-                "size": element["size"],
-                "page": element["page"]
+                "text": _clean_text(texts[idx]),
+                "size": float(sizes[idx]),
+                "page": int(pages[idx])
             })
     
     # Select the most likely title
@@ -216,69 +306,71 @@ def analyze_document_structure(text_elements):
     # Identify heading candidates
     potential_headings = []
     processed_texts = set()
+    # Heading checks only see the cleaned text and its formatting score, so a
+    # rejected (text, score) pair is rejected again wherever it repeats
+    rejected_spans = set()
+    doc_title_lower = doc_title.lower()
+    
+    span_columns = zip(texts, lower_texts, word_counts.tolist(), sizes.tolist(),
+                       pages.tolist(), format_scores.tolist(), fallback_levels.tolist())
     
-    for element in text_elements:
-        text_cleaned = clean_text(element["text"])
-        text_lower = text_cleaned.lower()
+    for text, text_lower, word_count, size, page, format_score, fallback_level in span_columns:
+        text_cleaned = _clean_text(text)
         
-        # Skip duplicates and the title itself
-        if text_lower in processed_texts or text_lower == doc_title.lower():
+        # Skip duplicates, repeats of rejected spans and the title itself
+        if text_lower in processed_texts or text_lower == doc_title_lower:
+            continue
+        span_key = (text_cleaned, format_score)
+        if span_key in rejected_spans:
             continue
         
-        if looks_like_heading(element["text"], element["size"], element["page"], element["flags"]):
-            heading_type = determine_heading_level(element["text"], element["size"], element["page"])
+        is_heading, heading_type = _looks_like_heading(text, text_lower, word_count, format_score)
+        if is_heading:
+            # Reuse the level implied by the numbering pattern when there is one
+            heading_type = heading_type or _determine_heading_level(text, fallback_level)
             potential_headings.append({
                 "text": text_cleaned,
                 "level": heading_type,
-                "page": element["page"],
-                "size": element["size"]
+                "page": page,
+                "size": size,
+                "word_count": word_count
             })
             processed_texts.add(text_lower)
+        else:
+            rejected_spans.add(span_key)
+    
+    # Final filtering of headings, done before sorting so fewer items are sorted
+    confirmed_headings = [h for h in potential_headings if _is_quality_heading(h["text"], h["word_count"])]
     
     # Sort headings by page and size
-    potential_headings.sort(key=lambda x: (x["page"], -x["size"]))
+    confirmed_headings.sort(key=lambda x: (x["page"], -x["size"]))
     
-    # Final filtering of headings
-    confirmed_headings = []
-    for heading in potential_headings:
-        text_content = heading["text"]
-        
-        # Additional quality checks
-        if (len(text_content.split()) >= 2 and \
-           not re.match(r'^\d+$', text_content) and \
-           not text_content.lower() in ['page', 'figure', 'table'] and \
-           len(text_content.strip()) >= 3):
-            confirmed_headings.append({
-                "level": heading["level"],
-                "text": text_content,
-                "page": heading["page"]
-            })
+    confirmed_headings = [{
+        "level": heading["level"],
+        "text": heading["text"],
+        "page": heading["page"]
+    } for heading in confirmed_headings]
     
     return confirmed_headings, doc_title
 
 
 # ----------------- Section Splitting Function ----------------- #
 
-def split_document_by_sections(pdf_file, filename):
-    """Divides PDF into logical sections by page"""
-    pdf_document = fitz.open(stream=pdf_file, filetype="pdf")
+def _split_sections(pdf_document, filename, max_pages=MAX_PAGES):
+    """Divides an open PDF into logical sections by page"""
     document_sections = []
 
-    for page_num in range(len(pdf_document)):
-        page_content = []
-        page_data = pdf_document[page_num].get_text("dict")
+    # Same page budget as extraction, so large PDFs cannot blow up memory
+    for page_num in range(min(len(pdf_document), max_pages)):
+        # Only the joined text is needed here, so let MuPDF build the plain
+        # text directly instead of walking the block/line/span tree
+        page_text = pdf_document[page_num].get_text("text")
+        full_page_text = " ".join(page_text.split())
+        
+        # Blank or image-only pages have no words to match, so emit no section
+        if not full_page_text:
+            continue
         
-        for content_block in page_data["blocks"]:
-            if "lines" not in content_block:
-                continue
-                
-            for text_line in content_block["lines"]:
-                for text_span in text_line["spans"]:
-                    line_content = text_span["text"].strip()
-                    if line_content:
-                        page_content.append(line_content)
-
-        full_page_text = " ".join(page_content)
         document_sections.append({
             "document": filename,
             "start_page": page_num + 1,
@@ -288,10 +380,45 @@ def split_document_by_sections(pdf_file, filename):
             "level": "auto"
         })
 
+    return document_sections
+
+
+def split_document_by_sections(pdf_file, filename, max_pages=MAX_PAGES):
+    """Divides PDF into logical sections by page"""
+    pdf_document = fitz.open(stream=pdf_file, filetype="pdf")
+    document_sections = _split_sections(pdf_document, filename, max_pages)
     pdf_document.close()
     return document_sections
 
 
+def _page_count(pdf_bytes):
+    """Number of pages in a PDF, read without touching page content"""
+    pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
+    page_count = len(pdf_document)
+    pdf_document.close()
+    return page_count
+
+
+@st.cache_resource(show_spinner=False)
+def _section_pool():
+    """Shared worker pool for splitting several PDFs at once"""
+    # Spawned workers re-import this script (in bare mode, where no button is
+    # pressed) before doing any work, so one pool is kept for the server
+    return ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+# ----------------- Cached PDF Parsing ----------------- #
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def parse_pdf(_pdf_bytes, pdf_key, max_pages=MAX_PAGES):
+    """Extracts text spans from a PDF, cached by its content digest"""
+    pdf_doc = fitz.open(stream=_pdf_bytes, filetype="pdf")
+    text_elements = _extract_spans(pdf_doc, max_pages)
+    pdf_doc.close()
+    return text_elements
+
+
 # ----------------- User Interface Setup ----------------- #
 
 # Create two tabs for different functionalities
@@ -305,14 +432,15 @@ with tab1:
     if uploaded_file:
         st.write(f"**Selected file:** {uploaded_file.name}")
         if st.button("Analyze Document Structure"):
-            progress = st.progress(0)
-            for percent in range(101):
-                time.sleep(0.01)
-                progress.progress(percent)
+            # Cached functions cannot update elements created outside them,
+            # so progress is reported between the extraction stages
+            progress = st.progress(0, text="Reading PDF...")
             
-            file_stream = BytesIO(uploaded_file.read())
-            extracted_text = extract_text_from_pdf(file_stream)
+            pdf_bytes = uploaded_file.getvalue()
+            extracted_text = parse_pdf(pdf_bytes, _pdf_cache_key(pdf_bytes))
+            progress.progress(0.5, text="Detecting headings...")
             document_headings, main_title = analyze_document_structure(extracted_text)
+            progress.progress(1.0, text="Done")
             
             st.success("Analysis complete!")
             st.markdown(f"### Document Title: {main_title}")
@@ -346,44 +474,69 @@ with tab2:
     task_description = st.text_input("Your Task (e.g., Review project timeline)")
     uploaded_files = st.file_uploader("Upload PDF documents", type="pdf", 
                                     accept_multiple_files=True, key="multi-upload")
+    page_budget = st.slider("Max pages per doc", 10, 500, MAX_PAGES)
     
     if role_input and task_description and uploaded_files:
         if st.button("Find Relevant Sections"):
             progress_bar = st.progress(0)
-            for pct_complete in range(101):
-                time.sleep(0.005)
-                progress_bar.progress(pct_complete)
             
+            file_contents = [document.getvalue() for document in uploaded_files]
+            file_names = [document.name for document in uploaded_files]
             all_doc_sections = []
-            for document in uploaded_files:
-                doc_stream = BytesIO(document.read())
-                all_doc_sections.extend(split_document_by_sections(doc_stream, document.name))
+            
+            # Documents are independent, so larger batches are split in worker
+            # processes; with one core or few pages the pool only adds overhead
+            worker_count = min(len(uploaded_files), os.cpu_count() or 1)
+            use_pool = worker_count > 1 and sum(
+                min(_page_count(content), page_budget) for content in file_contents) >= PARALLEL_MIN_PAGES
+            split_args = (file_contents, file_names, [page_budget] * len(file_names))
+            
+            try:
+                # map() submits every job at once, so a pool that broke while
+                # idle fails here rather than on the first result
+                if use_pool:
+                    file_results = _section_pool().map(split_document_by_sections, *split_args)
+                else:
+                    file_results = map(split_document_by_sections, *split_args)
+                # Results arrive in upload order as each file finishes
+                for files_done, file_sections in enumerate(file_results, 1):
+                    all_doc_sections.extend(file_sections)
+                    progress_bar.progress(files_done / len(uploaded_files))
+            except BrokenProcessPool:
+                # A crashed worker breaks the pool for good, so start a new one next time
+                _section_pool.clear()
+                raise
             
             # Create search keywords from inputs
-            search_terms = set((task_description + " " + role_input).lower().split())
-            important_sections = []
+            search_terms = frozenset(_WORD_RE.findall((task_description + " " + role_input).lower()))
             
-            for section in all_doc_sections:
-                section_words = set(section["section_title"].lower().split())
-                match_count = len(search_terms & section_words)
-                
-                if match_count:
-                    important_sections.append({
-                        "document": section["document"],
-                        "start_page": section["start_page"],
-                        "section_title": section["section_title"],
-                        "importance_rank": 0,  # Temporary value
-                        "refined_text": section["refined_text"][:1000]
-                    })
+            # Tokenize each section title once and score all sections up front
+            token_sets = [frozenset(_WORD_RE.findall(section["section_title"].lower()))
+                          for section in all_doc_sections]
+            scores = np.array([len(tokens & search_terms) for tokens in token_sets], dtype=np.int32)
+            matched_idx = np.flatnonzero(scores)
+            
+            # Select top sections: partition out the fifth-best score, then fully
+            # sort only the sections reaching it (ties included, so order is stable)
+            top_count = min(5, matched_idx.size)
+            ranked_idx = []
+            if top_count:
+                matched_scores = scores[matched_idx]
+                cutoff = -np.partition(-matched_scores, top_count - 1)[top_count - 1]
+                ranked_idx = sorted(matched_idx[matched_scores >= cutoff].tolist(), key=lambda i: (
+                    -scores[i],
+                    all_doc_sections[i]["document"],
+                    all_doc_sections[i]["start_page"]
+                ))[:top_count]
             
-            # Sort and select top sections
-            important_sections.sort(key=lambda s: (
-                -len(set(s["section_title"].lower().split()) & search_terms),
-                s["document"],
-                s["start_page"]
-            ))
+            top_sections = [{
+                "document": all_doc_sections[i]["document"],
+                "start_page": all_doc_sections[i]["start_page"],
+                "section_title": all_doc_sections[i]["section_title"],
+                "importance_rank": 0,  # Temporary value
+                "refined_text": all_doc_sections[i]["refined_text"][:1000]
+            } for i in ranked_idx]
             
-            top_sections = important_sections[:5]
             for i, section in enumerate(top_sections, 1):
                 section["importance_rank"] = i
             
@@ -1,66 +1,116 @@
 import streamlit as st
-import json
+import heapq
+import orjson
+import re
+import os
+import multiprocessing
 import fitz  # PyMuPDF
-import time
+import numpy as np
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from io import BytesIO
 
 st.set_page_config(page_title="Challenge 1 - Document Insights", layout="wide")
 st.title("📘 Adobe GenAI Challenge 1: Document Analysis")
 
 # ---------- PDF Text Extraction ---------- #
+@st.cache_data(show_spinner=False, max_entries=32)
 def extract(file_bytes):
+    # Spans as parallel columns: text/font lists plus packed size/page arrays
     doc = fitz.open(stream=file_bytes, filetype="pdf")
-    out = []
+    texts, fonts, sizes, pages = [], [], [], []
     for i in range(min(len(doc), 50)):
         for blk in doc[i].get_text("dict")["blocks"]:
             if "lines" in blk:
                 for ln in blk["lines"]:
                     for sp in ln["spans"]:
-                        out.append({"text": sp["text"].strip(), "size": sp["size"], "font": sp["font"], "page": i + 1})
+                        texts.append(sp["text"].strip()); fonts.append(sp["font"])
+                        sizes.append(sp["size"]); pages.append(i + 1)
     doc.close()
-    return out
+    return {"text": texts, "font": fonts,
+            "size": np.fromiter(sizes, dtype=np.float32, count=len(sizes)),
+            "page": np.fromiter(pages, dtype=np.int32, count=len(pages))}
 
 # ---------- Heading Detection ---------- #
 def detect(data):
-    if not data: return [], "Untitled"
-    sizes = [x["size"] for x in data]
-    avg, mx = sum(sizes)/len(sizes), max(sizes)
-    ttl = "Untitled"
-    out = []
-    for d in data:
-        txt, sz, ft = d["text"], d["size"], d["font"].lower()
-        if not txt or len(txt) < 3: continue
-        if sz >= mx * 0.95 and ttl == "Untitled": ttl = txt
-        elif sz > avg * 1.2 and ("bold" in ft or sz > avg * 1.5):
-            lvl = "H1" if sz >= avg * 1.5 else "H2" if sz >= avg * 1.3 else "H3"
-            out.append({"level": lvl, "text": txt, "page": d["page"]})
-    return out, ttl
+    if not data or not data["text"]: return [], "Untitled"
+    texts, n = data["text"], len(data["text"])
+    sizes = data["size"].astype(np.float64)
+    avg, mx = float(sizes.mean()), float(sizes.max())
+    usable = np.fromiter((len(t) >= 3 for t in texts), dtype=bool, count=n)
+    # Phase 1: the title is the first usable span at (near) the largest size
+    # (a span literally reading "Untitled" leaves the title unset, as before)
+    top = np.flatnonzero(usable & (sizes >= mx * 0.95)).tolist()
+    k = next((j for j, i in enumerate(top) if texts[i] != "Untitled"), len(top) - 1)
+    ttl = texts[top[k]] if top else "Untitled"
+    # Phase 2: every other usable span, classified with whole-array masks
+    bold = np.fromiter(("bold" in f.lower() for f in data["font"]), dtype=bool, count=n)
+    hit = usable & (sizes > avg * 1.2) & (bold | (sizes > avg * 1.5))
+    hit[top[:k + 1]] = False
+    lvls = np.select([sizes >= avg * 1.5, sizes >= avg * 1.3], ["H1", "H2"], "H3")
+    pages = data["page"].tolist()
+    return [{"level": str(lvls[i]), "text": texts[i], "page": pages[i]} for i in np.flatnonzero(hit).tolist()], ttl
 
 # ---------- Section Extractor ---------- #
-def extract_sections(file_bytes, filename):
+MAX_SECTION_PAGES = 100  # default 1B page budget
+
+def extract_sections(file_bytes, filename, max_pages=MAX_SECTION_PAGES):  # uncached: also runs in pool workers
     doc = fitz.open(stream=file_bytes, filetype="pdf")
     sections = []
-    for i in range(len(doc)):
-        content = []
-        for blk in doc[i].get_text("dict")["blocks"]:
-            if "lines" in blk:
-                for ln in blk["lines"]:
-                    for sp in ln["spans"]:
-                        txt = sp["text"].strip()
-                        if txt: content.append(txt)
-        full_text = " ".join(content)
+    for i in range(min(len(doc), max_pages)):
+        full_text = " ".join(doc[i].get_text("text").split())  # plain text, no span tree (spacing near punctuation/CJK differs from a span join)
         sections.append({
             "document": filename,
             "start_page": i + 1,
             "end_page": i + 1,
             "section_title": full_text[:80],
-            "refined_text": full_text,
+            "refined_text": full_text[:1000],  # only this much is ever output; keeps cache entries small
             "level": "auto"
         })
     doc.close()
     return sections
 
+# ---------- Parallel Multi-PDF Parsing ---------- #
+def _parse_one(payload): return extract_sections(*payload)
+
+PARALLEL_MIN_PAGES = 300  # smaller batches parse serially
+
+def _pages(file_bytes):
+    doc = fitz.open(stream=file_bytes, filetype="pdf"); n = len(doc); doc.close(); return n
+
+@st.cache_resource(show_spinner=False)
+def _pool(): return ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def parse_all(payloads):
+    workers = min(len(payloads), os.cpu_count() or 1)
+    if workers <= 1 or sum(min(_pages(b), mp) for b, _, mp in payloads) < PARALLEL_MIN_PAGES:
+        return [_parse_one(p) for p in payloads]
+    try: return list(_pool().map(_parse_one, payloads))
+    except BrokenProcessPool: _pool.clear(); raise
+
+_WORD_RE = re.compile(r"\w+")  # 1B tokens: words only, punctuation dropped
+STOP = frozenset("a an and are as at be by for from has have in into is it its of on or our so that the their this to was we were will with you your".split())
+
+# ---------- TF-IDF Ranking ---------- #
+def tfidf(titles, query):
+    # Smoothed idf, l2-normalised; one bincount pass stands in for the sparse title x query product
+    vocab, rows, cols, cnts = {}, [], [], []
+    for r, t in enumerate(titles):
+        for w, c in Counter(w for w in _WORD_RE.findall(t.lower()) if w not in STOP).items():
+            rows.append(r); cols.append(vocab.setdefault(w, len(vocab))); cnts.append(c)
+    out = np.zeros(len(titles)); qc = Counter(w for w in _WORD_RE.findall(query.lower()) if w in vocab)
+    if not qc: return out
+    rows, cols = np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+    idf = np.log((1 + len(titles)) / (1 + np.bincount(cols, minlength=len(vocab)))) + 1
+    wt = np.array(cnts, dtype=np.float64) * idf[cols]
+    qw = np.zeros(len(vocab))
+    for w, c in qc.items(): qw[vocab[w]] = c * idf[vocab[w]]
+    dots = np.bincount(rows, wt * qw[cols], minlength=len(titles)); hit = dots > 0
+    out[hit] = dots[hit] / (np.sqrt(np.bincount(rows, wt ** 2, minlength=len(titles)))[hit] * np.linalg.norm(qw))
+    return out
+
 # ---------- UI Tabs ---------- #
 tab1, tab2 = st.tabs(["🔹 Challenge 1A", "🔸 Challenge 1B"])
 
@@ -71,20 +121,17 @@ with tab1:
     if pdf:
         st.markdown(f"**File:** {pdf.name} ✅")
         if st.button("Extract Structure"):
-            pb = st.progress(0)
-            for i in range(101): time.sleep(0.01); pb.progress(i)
-            file_bytes = BytesIO(pdf.read())
-            data = extract(file_bytes)
-            out, ttl = detect(data)
+            pb = st.progress(0, text="Parsing PDF...")
+            data = extract(pdf.getvalue()); pb.progress(0.5, text="Detecting headings...")
+            out, ttl = detect(data); pb.progress(1.0, text="Done")
             st.success("Extraction Complete")
             st.markdown(f"### 📘 Title: {ttl}")
             st.markdown("### 📋 Outline")
-            for x in out:
-                st.markdown(f"- **Page {x['page']}** [{x['level']}]: {x['text']}")
+            st.markdown("\n".join(f"- **Page {x['page']}** [{x['level']}]: {x['text']}" for x in out))  # one element, not one per line
             st.markdown("### 📦 JSON Output")
             res = {"title": ttl, "outline": out}
-            st.json(res)
-            st.download_button("📥 Download JSON", data=json.dumps(res, indent=2), file_name="outline.json", mime="application/json")
+            raw = orjson.dumps(res, option=orjson.OPT_INDENT_2); st.json(raw.decode())  # serialize once for both
+            st.download_button("📥 Download JSON", data=raw, file_name="outline.json", mime="application/json")
 
 # ---------- Challenge 1B ---------- #
 with tab2:
@@ -92,42 +139,34 @@ with tab2:
     persona = st.text_input("Enter Persona (e.g., Travel Planner)")
     task = st.text_input("Enter Job to be Done (e.g., Plan a trip for 10 friends)")
     files = st.file_uploader("Upload PDFs", type="pdf", accept_multiple_files=True, key="pdf1")
+    max_pages = st.slider("Max pages per PDF", 10, 500, MAX_SECTION_PAGES)
 
     if persona and task and files:
         if st.button("Run Persona Analysis"):
-            pb = st.progress(0)
-            for i in range(101): time.sleep(0.005); pb.progress(i)
+            pb = st.progress(0, text=f"Parsing {len(files)} PDF(s)...")
+            all_parts = [s for parts in parse_all([(f.getvalue(), f.name, max_pages) for f in files]) for s in parts]
+            pb.progress(1.0, text="Done")
 
-            all_parts = []
-            for f in files:
-                file_bytes = BytesIO(f.read())
-                all_parts += extract_sections(file_bytes, f.name)
-
-            keys = set((task + " " + persona).lower().split())
+            scores = tfidf([s["section_title"] for s in all_parts], task + " " + persona).tolist()
             matched = []
-            for s in all_parts:
-                if s["refined_text"]:
-                    twords = set(s["section_title"].lower().split())
-                    score = len(twords & keys)
-                    if score:
-                        matched.append({
-                            "document": s["document"],
-                            "start_page": s["start_page"],
-                            "section_title": s["section_title"],
-                            "importance_rank": 0,
-                            "refined_text": s["refined_text"][:1000]
-                        })
-
-            matched.sort(key=lambda x: (-len(set(x["section_title"].lower().split()) & keys), x["document"], x["start_page"]))
-            matched = matched[:5]
+            for s, score in zip(all_parts, scores):
+                if s["refined_text"] and score > 0:
+                    matched.append({
+                        "document": s["document"],
+                        "start_page": s["start_page"],
+                        "section_title": s["section_title"],
+                        "importance_rank": 0,
+                        "refined_text": s["refined_text"],
+                        "_score": score  # scored once; the sort key just reads it
+                    })
+
+            matched = heapq.nsmallest(5, matched, key=lambda x: (-x["_score"], x["document"], x["start_page"]))  # == sorted(...)[:5]
             for i, m in enumerate(matched): m["importance_rank"] = i + 1
 
             st.success(f"Top {len(matched)} sections selected")
             for i, sec in enumerate(matched, 1):
                 with st.expander(f"#{i}: {sec['section_title']} (Page {sec['start_page']})"):
-                    st.markdown(f"**Document:** {sec['document']}")
-                    st.markdown(f"**Rank:** {sec['importance_rank']}")
-                    st.markdown(f"**Summary:** {sec['refined_text'][:300]}...")
+                    st.markdown(f"**Document:** {sec['document']}\n\n**Rank:** {sec['importance_rank']}\n\n**Summary:** {sec['refined_text'][:300]}...")
 
             output = {
                 "metadata": {
@@ -154,5 +193,5 @@ with tab2:
             }
 
             st.subheader("📄 Output JSON Preview")
-            st.json(output)
-            st.download_button("📥 Download JSON", data=json.dumps(output, indent=2), file_name="challenge1B_output.json", mime="application/json")
+            raw = orjson.dumps(output, option=orjson.OPT_INDENT_2); st.json(raw.decode())
+            st.download_button("📥 Download JSON", data=raw, file_name="challenge1B_output.json", mime="application/json")